@@ -20,18 +20,88 @@ Features:
   • Accept any /NACA/ namelist key → writes verbatim, with Fortran quoting
   • Write to nml/<stem>.nml, run once (interactive), move outputs to out/, gnu/, dbg/
   • Optional return_xy + preview plotting using namelist['name'] as title
+    (one reused figure; show=False / save_preview=path for headless runs)
   • Parses both symmetric and cambered output
   • Export a labeled .dat file for XFOIL in out/xfoil via _export_for_xfoil()
+  • generate_batch() runs independent airfoils in parallel for sweeps
   • Timeout and error handling
 """
 
+import mmap
+import os
 import re
-import subprocess, shutil
+import subprocess, shutil, tempfile
+from string import ascii_lowercase, digits
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Tuple, Optional, Union
+from typing import Any, Dict, Iterable, List, Set, Tuple, Optional, Union
 
 import numpy as np
-import matplotlib.pyplot as plt
+
+
+# roots whose output directories have already been created this process
+_INITIALIZED_ROOTS: Set[Path] = set()
+
+
+@lru_cache(maxsize=None)
+def _resolve_root(root: str, cwd: str) -> Path:
+    """Absolute project root; cwd is part of the key for relative paths."""
+    return Path(root).expanduser().resolve()
+
+
+# typed=True keeps True/1 and 1/1.0 apart; they format differently.
+@lru_cache(maxsize=4096, typed=True)
+def _format_scalar(v: Any) -> str:
+    """Fortran namelist literal for a scalar value."""
+    if isinstance(v, bool):
+        return ".TRUE." if v else ".FALSE."
+    if isinstance(v, str):
+        return v if v.startswith(("'", '"')) else f"'{v}'"
+    return str(v)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _make_name_from_tuple(profile: Any, cl: Any, toc: Any,
+                          cmax: Any, xmaxc: Any) -> str:
+    """Canonical NACA name; cached for parameter sweeps."""
+    prof = str(profile).upper()
+    cl   = float(cl)
+    t    = float(toc)
+    td = int(round(t * 100))
+
+    if prof == '4':
+        m = int(round(float(cmax) * 100))
+        p = int(round(float(xmaxc) * 10))
+        return f"NACA {m}{p}{td:02d}"
+    if prof == '5':
+        X = int(round((cl * 10) / 1.5))
+        YZ = int(round(float(xmaxc) * 20))
+        return f"NACA {X}{YZ:02d}{td:02d}"
+    if prof.startswith(('6','7','8')):
+        cl_dig = int(round(cl * 10))
+        return f"NACA {prof}{cl_dig}{td:02d}"
+    if prof == '16':
+        X = int(round(cl * 10))
+        return f"NACA 16-{X}{td:02d}"
+
+    raise ValueError(f"Unsupported profile family: {prof}")
+
+
+def _reorder(x: np.ndarray,
+             yu: np.ndarray,
+             yl: np.ndarray,
+             xs: np.ndarray,
+             ys: np.ndarray) -> None:
+    """
+    Write the TE→LE→TE ordering of (x, yu, yl) into xs, ys (length 2n-1);
+    the shared leading-edge point appears once.
+    """
+    n = x.shape[0]
+    xs[:n] = x[::-1]
+    ys[:n] = yu[::-1]
+    xs[n:] = x[1:]
+    ys[n:] = yl[1:]
 
 
 class NACA456:
@@ -42,26 +112,56 @@ class NACA456:
       - moves .out, .gnu, .dbg
       - parses symmetric and cambered coords
       - exports .dat for XFOIL
+      - runs batches of airfoils in parallel
     """
+    # coordinate block: marker line, column header, then rows up to a
+    # blank line or the "End of output" line
+    _RE_BLOCK = re.compile(
+        rb"(?:(?P<cambered>INTERPOLATED COORDINATES)|SYMMETRICAL AIRFOIL DEFINITION)[^\n]*\n"
+        rb"[ \t]*x[^\n]*(?:yupper|dy/dx)[^\n]*\n"
+        rb"(?P<data>.*?)(?=\n[ \t\r]*(?:\n|end)|\Z)",
+        re.I | re.S)
+    _RE_OVERFLOW = re.compile(rb"\*+")
+    
+    # filename stems keep only [a-z0-9]
+    _STEM_TABLE = str.maketrans('', '', ''.join(
+        c for c in map(chr, range(128)) if c not in ascii_lowercase + digits))
+    
     def __init__(self,
                  root: Union[Path, str] = Path.home()/"GitHub"/"naca456",
                  exe: str = "naca456"):
-        self.root = Path(root).expanduser().resolve()
+        self.root = _resolve_root(str(root), os.getcwd())
         self.exe = self.root / exe
         if not self.exe.exists():
             raise FileNotFoundError(f"naca456 not found at {self.exe}")
         
-        # ensure directories exist
-        for sub in ("nml","out","gnu","dbg","out/xfoil"):
-            (self.root / sub).mkdir(parents=True, exist_ok=True)
+        self._nml_dir   = self.root / "nml"
+        self._out_dir   = self.root / "out"
+        self._gnu_dir   = self.root / "gnu"
+        self._dbg_dir   = self.root / "dbg"
+        self._xfoil_dir = self.root / "out" / "xfoil"
+        
+        # ensure directories exist (once per root per process); one scandir
+        # per level, then mkdir only what is missing
+        if self.root not in _INITIALIZED_ROOTS:
+            present = {e.name for e in os.scandir(self.root) if e.is_dir()}
+            for d in (self._nml_dir, self._out_dir, self._gnu_dir, self._dbg_dir):
+                if d.name not in present:
+                    d.mkdir(exist_ok=True)
+            if "xfoil" not in {e.name for e in os.scandir(self._out_dir) if e.is_dir()}:
+                self._xfoil_dir.mkdir(exist_ok=True)
+            _INITIALIZED_ROOTS.add(self.root)
+        
+        # preview figure, created on first use and reused afterwards
+        self._fig = None
+        self._ax = None
 
 
     def _format_val(self, v: Any) -> str:
-        if isinstance(v, bool):
-            return ".TRUE." if v else ".FALSE."
-        if isinstance(v, str):
-            return v if v.startswith(("'", '"')) else f"'{v}'"
-        return str(v)
+        try:
+            return _format_scalar(v)
+        except TypeError:  # unhashable, e.g. a list
+            return str(v)
     
     
     def _make_naca_name(self, nml: Dict[str, Any]) -> str:
@@ -69,27 +169,11 @@ class NACA456:
         Generate the canonical NACA name from namelist dict.
         Supports 4-digit, 5-digit, 6/7/8-series, 16-series.
         """
-        prof = str(nml.get('profile','')).upper()
-        cl   = float(nml.get('cl', 0.0))
-        t    = float(nml.get('toc', 0.0))
-        td = int(round(t * 100))
-
-        if prof == '4':
-            m = int(round(float(nml.get('cmax', 0.0)) * 100))
-            p = int(round(float(nml.get('xmaxc', 0.0)) * 10))
-            return f"NACA {m}{p}{td:02d}"
-        if prof == '5':
-            X = int(round((cl * 10) / 1.5))
-            YZ = int(round(float(nml.get('xmaxc', 0.0)) * 20))
-            return f"NACA {X}{YZ:02d}{td:02d}"
-        if prof.startswith(('6','7','8')):
-            cl_dig = int(round(cl * 10))
-            return f"NACA {prof}{cl_dig}{td:02d}"
-        if prof == '16':
-            X = int(round(cl * 10))
-            return f"NACA 16-{X}{td:02d}"
-
-        raise ValueError(f"Unsupported profile family: {prof}")
+        return _make_name_from_tuple(nml.get('profile',''),
+                                     nml.get('cl', 0.0),
+                                     nml.get('toc', 0.0),
+                                     nml.get('cmax', 0.0),
+                                     nml.get('xmaxc', 0.0))
     
     
     def _export_for_xfoil(self,
@@ -103,124 +187,252 @@ class NACA456:
         """
         Reorder arrays from TE→LE→TE, and export for XFOIL.
         """
-        xs = np.concatenate([x[::-1], x[1:]])
-        ys = np.concatenate([y_upper[::-1], y_lower[1:]])
-        datp = self.root / 'out' / 'xfoil' / f"{stem}.dat"
+        # one (2n-1, 2) buffer; its columns are filled in place, so no
+        # concatenate temporaries are needed
+        n = len(x)
+        xy = np.empty((2*n-1, 2), dtype=np.result_type(x, y_upper, y_lower))
+        _reorder(x, y_upper, y_lower, xy[:,0], xy[:,1])
+        datp = self._xfoil_dir / f"{stem}.dat"
         with datp.open('w') as f:
             f.write(f"{airfoil_name}\n")
-            for xi, yi in zip(xs, ys): f.write(f"{xi:.6f}  {yi:.6f}\n")
+            # one %-format over all values; np.savetxt formats row by row
+            f.write(("%.6f  %.6f\n" * len(xy)) % tuple(xy.ravel().tolist()))
         return datp
 
 
+    def _render_preview(self,
+                        x: np.ndarray,
+                        y_upper: np.ndarray,
+                        y_lower: np.ndarray,
+                        is_cambered: bool,
+                        airfoil_name: str,
+                        *,
+                        show: bool = True,
+                        save_path: Optional[Union[Path, str]] = None
+                        ) -> None:
+        """
+        Draw the profile on a single Figure/Axes that is reused across
+        calls (recreated only if the user closed its window), then
+        optionally save it to save_path and/or show it.
+        """
+        import matplotlib.pyplot as plt  # heavy; only needed for previews
+        
+        if self._fig is None or not plt.fignum_exists(self._fig.number):
+            self._fig, self._ax = plt.subplots(figsize=(6,3))
+        else:
+            self._ax.clear()
+        
+        ax = self._ax
+        ax.plot(x, y_upper, '-c', linewidth=0.8, label='Upper')
+        if is_cambered:
+            ax.plot(x, y_lower, '-r', linewidth=0.8, label='Lower'), ax.legend()
+        else:
+            ax.plot(x, y_lower, '-c', linewidth=0.8, label='Lower')
+        ax.axis('equal')
+        ax.grid(alpha=0.4)
+        ax.set_title(airfoil_name)
+        ax.set_xlabel('x/c')
+        ax.set_ylabel('y/c')
+        
+        if save_path is not None:
+            self._fig.savefig(save_path)
+        if show:
+            plt.show()
+    
+    
+    def _write_nml(self, namelist: Dict[str, Any], stem: str) -> None:
+        """
+        Write namelist to nml/<stem>.nml.
+        """
+        nml = self._nml_dir / f"{stem}.nml"
+        body = ("&NACA\n"
+                + "".join(f"  {k} = {self._format_val(v)},\n" for k, v in namelist.items())
+                + "/\n")
+        nml.write_text(body)
+    
+    
+    def _resolve_name(self, namelist: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        Fill in namelist['name'] if missing and derive the filename stem.
+        Returns (name, stem).
+        """
+        # get NACA profile name
+        if namelist.get('name') is None:
+            name = self._make_naca_name(namelist)
+            namelist['name'] = name
+        else:
+            name = namelist['name']
+            
+        # create filename stem
+        stem = name.lower().translate(self._STEM_TABLE)
+        if not stem.isascii():  # the table only covers ASCII
+            stem = stem.encode('ascii', 'ignore').decode('ascii')
+        print("\n " + name + " (" + stem + ")")
+        return name, stem
+    
+    
+    def _match_block(self, buf: Any) -> Optional[Tuple[bytes, bool]]:
+        """
+        Find the coordinate block in a bytes-like buffer.
+        Returns (data, is_cambered), or None if there is no block.
+        """
+        m = self._RE_BLOCK.search(buf)
+        if m is None:
+            return None
+        return m['data'], m['cambered'] is not None
+    
+    
+    def _run_one(self,
+                 stem: str,
+                 name: str,
+                 timeout: int
+                 ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, bool]:
+        """
+        Run naca456 on nml/<stem>.nml, parse the coordinates (from stdout
+        when present, else the run's own naca.out), move its outputs
+        (also on failure) and export for XFOIL.
+        Returns (x, y_up, y_low, is_cambered).
+        """
+        nml = self._nml_dir / f"{stem}.nml"
+        
+        # naca456 always writes naca.out/gnu/dbg to its cwd, so each run
+        # gets a private directory; concurrent runs cannot collide. It lives
+        # under out/ (same filesystem as every destination) so the outputs
+        # can be renamed into place atomically, and a killed run never
+        # leaves scratch directories next to the sources.
+        workdir = Path(tempfile.mkdtemp(prefix="naca456_", dir=self._out_dir))
+        try:
+            # 1) Invoke naca456 interactively
+            proc = subprocess.run(
+                [str(self.exe)],
+                cwd=workdir,
+                input=f"{nml}\n".encode(),
+                capture_output=True,
+                check=True,
+                timeout=timeout
+            )
+            
+            # 2) Parse coords, before anything leaves workdir
+            # take the block from stdout if the executable echoes it there;
+            # otherwise search the mapped naca.out in place, so only the
+            # data block is copied out
+            block = self._match_block(proc.stdout)
+            outp = workdir / 'naca.out'
+            if block is None and outp.is_file() and outp.stat().st_size > 0:
+                with outp.open('rb') as fh, \
+                     mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    block = self._match_block(mm)
+            if block is None:
+                # naca456 STOPs with exit code 0 on bad input, so its
+                # console messages are the only record of why
+                tail = "\n".join(proc.stdout.decode(errors='replace').splitlines()[-5:])
+                raise RuntimeError(f"No coordinate block found in naca456 output for {stem}; "
+                                   f"naca456 printed:\n{tail}")
+            data, is_cambered = block
+        finally:
+            # 3) Move outputs, even after a failure: they are the only
+            # record of what naca456 complained about
+            try:
+                for src, d in (('naca.out',self._out_dir),('naca.gnu',self._gnu_dir),('naca.dbg',self._dbg_dir)):
+                    s = workdir/src
+                    if s.exists():
+                        os.replace(s, d / f"{stem}.{src.split('.')[-1]}")
+            finally:
+                shutil.rmtree(workdir, ignore_errors=True)
+        
+        # overflowed fields are printed as '*' (sometimes glued to the
+        # previous value); turn each run into NaN so every row keeps its
+        # column count, then parse the block straight into one float64 array
+        data = self._RE_OVERFLOW.sub(b" nan ", data)
+        rows = [L for L in data.splitlines() if L.strip()]
+        ncols = len(rows[0].split()) if rows else 0
+        if ncols == 0:
+            raise RuntimeError(f"Empty coordinate block in naca456 output for {stem}")
+        # older NumPy only warns on unparsable text and returns a truncated
+        # array, so check that every value of every row was consumed
+        try:
+            arr = np.fromstring(data, dtype=np.float64, sep=" ")
+        except ValueError as e:
+            raise RuntimeError(f"Malformed coordinate block in naca456 output for {stem}: {e}") from e
+        if arr.size != len(rows) * ncols:
+            raise RuntimeError(f"Malformed coordinate block in naca456 output for {stem}: "
+                               f"parsed {arr.size} values, expected {len(rows)} rows x {ncols}")
+        arr = arr.reshape(-1, ncols)
+        x, yu = arr[:,1], arr[:,2]
+        yl = arr[:,3] if is_cambered else -yu
+        
+        # 4) Export for XFOIL
+        self._export_for_xfoil(x, yu, yl, name, stem)
+        return x, yu, yl, is_cambered
+
+
     def generate(self,
                  namelist: Dict[str, Any],
                  *,
                  preview: bool = False,
+                 show: bool = True,
+                 save_preview: Optional[Union[Path, str]] = None,
                  timeout: int = 20
                  ) -> Union[Tuple[np.ndarray,np.ndarray], Tuple[np.ndarray,np.ndarray,np.ndarray]]:
         """
         namelist: dict of NACA profile shape parameters
         preview: if True, plot profile
+        show: if False, draw the preview without opening a window
+        save_preview: optional image path; the preview is saved there
         timeout: seconds to wait for naca456
 
         Returns (x,y) for symmetric or (x, y_up, y_low) for cambered.
         """
         
-        # 0) Get NACA profile name
-        if namelist.get('name') is None:
-            name = self._make_naca_name(namelist)
-            namelist['name'] = name
-        else:
-            name = namelist['name']
-            
-        # create filename stem
-        stem = name.lower()
-        stem = re.sub(r'[^a-z0-9]', '', stem)
-        print("\n " + name + " (" + stem + ")")
+        # 0) Resolve name, write .nml input file
+        name, stem = self._resolve_name(namelist)
+        self._write_nml(namelist, stem)
         
+        # 1) Run naca456, parse coords, export for XFOIL
+        x, yu, yl, is_cambered = self._run_one(stem, name, timeout)
         
-        # 1) Write .nml input file
-        nml = self.root / "nml" / f"{stem}.nml"
-        with nml.open('w') as f:
-            f.write("&NACA\n")
-            for k, v in namelist.items():
-                f.write(f"  {k} = {self._format_val(v)},\n")
-            f.write("/\n")
-        
-        # 2) Invoke naca456 interactively
-        subprocess.run(
-            [str(self.exe)],
-            cwd=self.root,
-            input=str(nml) + "\n",
-            text=True,
-            check=True,
-            timeout=timeout
-        )
-        
-        # 3) Move outputs
-        for src, d in (('naca.out','out'),('naca.gnu','gnu'),('naca.dbg','dbg')):
-            s = self.root/src
-            if s.exists():
-                shutil.move(s, self.root / d / f"{stem}.{src.split('.')[-1]}")
-        
-        # 4) Parse coords
-        outp = self.root/'out'/f"{stem}.out"
-        lines = outp.read_text().splitlines()
-        
-        # find interpolated vs symmetric
-        interp_i = next((i for i,L in enumerate(lines)
-                         if 'INTERPOLATED COORDINATES' in L),None)
-        x, yu, yl = [], [], []
-        
-        if interp_i is not None:
-            # cambered
-            is_cambered = True
-            header_i = next(j for j in range(interp_i+1, len(lines))
-                            if lines[j].strip().lower().startswith('x') and 'yupper' in lines[j].lower())
-            for L in lines[header_i+1:]:
-                if not L.strip() or L.strip().lower().startswith('end'):
-                    break
-                p=L.split()
-                x.append(float(p[1].strip(" *")))
-                yu.append(float(p[2].strip(" *")))
-                yl.append(float(p[3].strip(" *")))
-        else:
-            # symmetric
-            is_cambered = False
-            header_i = next(i for i,L in enumerate(lines)
-                            if L.lstrip().lower().startswith('x') and 'dy/dx' in L.lower())
-            for L in lines[header_i+1:]:
-                if not L.strip() or L.strip().lower().startswith('end'):
-                    break
-                p=L.split()
-                x.append(float(p[1].strip(" *")))
-                yu.append(float(p[2].strip(" *")))
-            yl = [-v for v in yu]
-        
-        x = np.array(x)
-        yu = np.array(yu)
-        yl = np.array(yl)
-        
-        # 5) Preview plot
-        if preview:
-            plt.figure(figsize=(6,3))
-            plt.plot(x, yu, '-c', linewidth=0.8, label='Upper')
-            if is_cambered:
-                plt.plot(x, yl, '-r', linewidth=0.8, label='Lower'), plt.legend()
-            else:
-                plt.plot(x, yl, '-c', linewidth=0.8, label='Lower')
-            plt.axis('equal')
-            plt.grid(alpha=0.4)
-            plt.title(name)
-            plt.xlabel('x/c')
-            plt.ylabel('y/c')
-            plt.show()
-    
-        # 6) Export for XFOIL
-        self._export_for_xfoil(x, yu, yl, name, stem)
+        # 2) Preview plot
+        if preview or save_preview is not None:
+            self._render_preview(x, yu, yl, is_cambered, name,
+                                 show=preview and show, save_path=save_preview)
         
-        # 7) Return
+        # 3) Return
         return (x, yu, yl) if is_cambered else (x, yu)
+    
+    
+    def generate_batch(self,
+                       namelists: Iterable[Dict[str, Any]],
+                       *,
+                       workers: Optional[int] = None,
+                       timeout: int = 20
+                       ) -> List[Union[Tuple[np.ndarray,np.ndarray], Tuple[np.ndarray,np.ndarray,np.ndarray]]]:
+        """
+        namelists: iterable of namelist dicts, one per airfoil
+        workers: number of concurrent naca456 runs (default: CPU count)
+        timeout: seconds to wait for each naca456 run
+
+        Writes every .nml up front, then runs the independent airfoils in
+        parallel. Returns a list of generate() results, in input order.
+        Raises ValueError if two namelists map to the same filename stem,
+        since their .nml/.out/.dat files would overwrite each other.
+        """
+        namelists = list(namelists)
+        jobs = [self._resolve_name(nl) for nl in namelists]
+        seen = set()
+        for name, stem in jobs:
+            if stem in seen:
+                raise ValueError(f"Duplicate airfoil stem '{stem}' ({name}) in batch; "
+                                 "give each namelist a distinct 'name'")
+            seen.add(stem)
+        for nl, (name, stem) in zip(namelists, jobs):
+            self._write_nml(nl, stem)
+        
+        # the work happens in the naca456 subprocesses, so threads suffice
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+            runs = list(ex.map(lambda job: self._run_one(job[1], job[0], timeout), jobs))
+        
+        return [(x, yu, yl) if is_cambered else (x, yu)
+                for x, yu, yl, is_cambered in runs]
 
 
 